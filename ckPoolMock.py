@@ -0,0 +1,447 @@
+#!/usr/bin/env python
+
+"""A local mock of the CK Solo pool, used to test ckPoolNotify.py."""
+
+################################################################################
+#
+#	File:		ckPoolMock.py
+#
+#	Contains:	A small HTTP server that stands in for the CK Solo pool, and for
+#				the difficulty and block explorer services that ckPoolNotify.py
+#				uses, so that the monitor can be tested without touching the
+#				network. These paths are served:
+#
+#				/users/ADDRESS			User stats, like the pool's
+#				/workers/ADDRESS.NAME	Worker stats, like the pool's
+#				/list					A monitor list of the mock workers
+#				/q/getdifficulty		The difficulty as a plain number
+#				/address/ADDRESS		A blockchain.info address response with
+#										the newest block paid to the address
+#				/api/address/ADDRESS/txs	The same, as an Esplora response
+#
+#				Each time a user or worker is read, its shares go up and its
+#				best share sometimes improves. Each time the block explorer is
+#				asked, the pool sometimes finds a block. The same seed gives the
+#				same results for the same requests.
+#
+#				JSON-RPC requests posted to / are answered like a bitcoin node,
+#				for the rpc block source (--blocksource rpc). The mock node
+#				answers getbestblockhash, getblockhash, getblockheader, getblock
+#				and waitfornewblock, and mines blocks every few seconds with the
+#				--nodeblockseconds option. Mining several blocks at a time with
+#				--nodeblockcount tests that no block is skipped:
+#
+#				ckPoolMock.py --port 8880 --nodeblockseconds 10 --nodeblockcount 3 &
+#				ckPoolNotify.py --blocksource rpc --noderpcurl http://127.0.0.1:8880 --poolbaseurl http://127.0.0.1:8880 --listurls http://127.0.0.1:8880/list -f sender@example.com -r recipient@example.com
+#
+#				The difficulty and block explorer paths can be made slow or
+#				unreliable with the --delay and --failrate options, and with
+#				--unconfirmed the block explorer lists an unconfirmed
+#				transaction first. Running two mock pools with different
+#				delays tests how the monitor hedges and fails over between
+#				providers:
+#
+#				ckPoolMock.py --port 8880 --listsize 10 &
+#				ckPoolMock.py --port 8881 --listsize 0 --delay 2 --failrate 0.3 &
+#				ckPoolNotify.py --hedge --poolbaseurl http://127.0.0.1:8880 --listurls http://127.0.0.1:8880/list --difficultyproviders http://127.0.0.1:8881/q/getdifficulty,http://127.0.0.1:8880/q/getdifficulty --blockproviders "esplora:http://127.0.0.1:8881/api/address/{address}/txs,http://127.0.0.1:8880/address/{address}?format=json" -f sender@example.com -r recipient@example.com --debug
+#
+#				For example, to simulate a week of polling ten workers every ten
+#				minutes:
+#
+#				ckPoolMock.py --port 8880 --listsize 10 &
+#				ckPoolNotify.py --simulatedays 7 --sleepseconds 600 --poolbaseurl http://127.0.0.1:8880 --listurls http://127.0.0.1:8880/list -f sender@example.com -r recipient@example.com
+#
+#				See the help documentation for the options:
+#
+#				ckPoolMock.py --help
+#
+################################################################################
+
+#---------------------------------------------------------------------------------------------------
+import sys
+import time
+import json
+import random
+import hashlib
+import threading
+import BaseHTTPServer
+import SocketServer
+from optparse import OptionParser
+
+#---------------------------------------------------------------------------------------------------
+# Global variables
+gDefaultPort = 8880
+gDefaultListSize = 100
+gDefaultDifficulty = 1.0e14
+gDefaultBlockChance = 0.01
+gDefaultBestShareChance = 0.05
+gDefaultHashRate = 1.0e12
+gDefaultFinderAddress = "1MockFinderAddressxxxxxxxxxxxxxxxx"
+gDefaultMinerAddress = "1MockMinerAddressxxxxxxxxxxxxxxxxx"
+gMockAddressFormat = "1MockAddress%06d"
+gPoolFeeAddress = "1PKN98VN2z5gwSGZvGKS2bj8aADZBkyhkZ"
+gDefaultNodePoolChance = 0.5
+gFirstBlockHeight = 800000
+
+# The bitcoin node's RPC error codes
+gRpcMethodNotFoundCode = -32601
+gRpcInvalidParameterCode = -8
+gRpcBlockNotFoundCode = -5
+
+#---------------------------------------------------------------------------------------------------
+# Format a hash rate in hashes per second like the pool does, for example "1.2T"
+def formatHashRate(hashRate):
+	for curSuffix in ["", "K", "M", "G", "T", "P", "E"]:
+		if hashRate < 1000.0:
+			return ("%.2f" % hashRate) + curSuffix
+		hashRate = hashRate / 1000.0
+	return ("%.2f" % (hashRate * 1000.0)) + "E"
+
+#---------------------------------------------------------------------------------------------------
+# The state of the mock pool. The stats of each user and worker, and the newest block found by the
+# pool, change each time they are read.
+class MockPool:
+
+	#---------------------------------------------------------------------------
+	# Default constructor
+	def __init__(self, listSize=gDefaultListSize, difficulty=gDefaultDifficulty, blockChance=gDefaultBlockChance, ourBlockChance=0.0, bestShareChance=gDefaultBestShareChance, delaySeconds=0.0, failRate=0.0, unconfirmed=False, seed=0):
+		# Initialize the member variables with defaults
+		self.listSize = listSize
+		self.difficulty = difficulty
+		self.blockChance = blockChance
+		self.ourBlockChance = ourBlockChance
+		self.bestShareChance = bestShareChance
+		self.delaySeconds = delaySeconds
+		self.failRate = failRate
+		self.unconfirmed = unconfirmed
+		self.random = random.Random(seed)
+		
+		# The delays and failures have their own random numbers, so that they don't change the
+		# stats and blocks
+		self.faultRandom = random.Random(seed)
+		self.lock = threading.Lock()
+		self.stats = {}
+		self.blockHeight = 800000
+		self.blockFinder = gDefaultFinderAddress
+
+	#---------------------------------------------------------------------------
+	# Returns the workers in the monitor list, one per line
+	def getListText(self):
+		lines = ["# Mock pool workers"]
+		for curIndex in range(self.listSize):
+			lines.append((gMockAddressFormat % curIndex) + ".worker")
+		return "\n".join(lines) + "\n"
+
+	#---------------------------------------------------------------------------
+	# Returns the stats of a user or worker, after adding the shares it submitted since it was
+	# last read
+	def getStats(self, address):
+		with self.lock:
+			curStats = self.stats.get(address)
+			if curStats is None:
+				curStats = {"hashRate": gDefaultHashRate * self.random.uniform(0.5, 1.5), "shares": 0, "bestShare": 0.0}
+				self.stats[address] = curStats
+
+			curStats["shares"] = curStats["shares"] + self.random.randint(1000, 2000)
+			if self.random.random() < self.bestShareChance:
+				curStats["bestShare"] = max(curStats["bestShare"], self.difficulty * self.random.random() * self.random.random() * 0.01)
+
+			hashRate = formatHashRate(curStats["hashRate"])
+			return {
+				"hashrate1m": hashRate,
+				"hashrate5m": hashRate,
+				"hashrate1hr": hashRate,
+				"hashrate1d": hashRate,
+				"hashrate7d": hashRate,
+				"lastshare": int(time.time()),
+				"lastupdate": int(time.time()),
+				"shares": curStats["shares"],
+				"bestshare": curStats["bestShare"],
+				"bestever": int(curStats["bestShare"]),
+			}
+
+	#---------------------------------------------------------------------------
+	# Returns the height and finder of the newest block paid to the pool fee address. The pool
+	# sometimes finds a new block each time it's asked.
+	def getNewestBlock(self):
+		with self.lock:
+			if self.random.random() < self.blockChance:
+				self.blockHeight = self.blockHeight + self.random.randint(1, 5)
+				self.blockFinder = gDefaultFinderAddress
+				if (self.listSize > 0) and (self.random.random() < self.ourBlockChance):
+					self.blockFinder = gMockAddressFormat % self.random.randrange(self.listSize)
+			return (self.blockHeight, self.blockFinder)
+
+	#---------------------------------------------------------------------------
+	# Returns a blockchain.info address response with the newest block paid to the address
+	def getAddressResponse(self, address):
+		(blockHeight, blockFinder) = self.getNewestBlock()
+		transactions = [{"block_height": blockHeight, "out": [{"addr": blockFinder}, {"addr": address}]}]
+		if self.unconfirmed:
+			transactions.insert(0, {"block_height": None, "out": [{"addr": gDefaultMinerAddress}, {"addr": address}]})
+		return {"txs": transactions}
+
+	#---------------------------------------------------------------------------
+	# Returns an Esplora address transactions response with the newest block paid to the address
+	def getEsploraResponse(self, address):
+		(blockHeight, blockFinder) = self.getNewestBlock()
+		transactions = [{"status": {"confirmed": True, "block_height": blockHeight}, "vout": [{"scriptpubkey_address": blockFinder}, {"scriptpubkey_address": address}]}]
+		if self.unconfirmed:
+			transactions.insert(0, {"status": {"confirmed": False}, "vout": [{"scriptpubkey_address": gDefaultMinerAddress}, {"scriptpubkey_address": address}]})
+		return transactions
+
+	#---------------------------------------------------------------------------
+	# Wait out the delay for a difficulty or block explorer answer, and returns whether it should
+	# fail instead
+	def isLookupFailure(self):
+		with self.lock:
+			delaySeconds = self.faultRandom.uniform(0.0, self.delaySeconds)
+			isFailure = self.faultRandom.random() < self.failRate
+		time.sleep(delaySeconds)
+		return isFailure
+
+#---------------------------------------------------------------------------------------------------
+# An error returned by a JSON-RPC call to the mock node
+class MockRpcError(Exception):
+
+	#---------------------------------------------------------------------------
+	# Default constructor
+	def __init__(self, code, message):
+		Exception.__init__(self, message)
+		self.code = code
+
+#---------------------------------------------------------------------------------------------------
+# The chain of a mock bitcoin node. Each block's coinbase pays either the pool fee address and a
+# finder, when the pool found the block, or just another miner's address.
+class MockNode:
+
+	#---------------------------------------------------------------------------
+	# Default constructor
+	def __init__(self, listSize=gDefaultListSize, poolChance=gDefaultNodePoolChance, ourBlockChance=0.0, longPoll=True, seed=0):
+		# Initialize the member variables with defaults
+		self.listSize = listSize
+		self.poolChance = poolChance
+		self.ourBlockChance = ourBlockChance
+		self.longPoll = longPoll
+		self.random = random.Random(seed)
+		self.condition = threading.Condition()
+		self.finders = []
+		self.heights = {}
+		self.mineBlocks(1)
+
+	#---------------------------------------------------------------------------
+	# Returns the hash of the block at the specified height
+	def getBlockHash(self, height):
+		return hashlib.sha256("Mock block " + str(height)).hexdigest()
+
+	#---------------------------------------------------------------------------
+	# Add the specified number of blocks to the chain, and wake up anyone waiting for a new block
+	def mineBlocks(self, count):
+		with self.condition:
+			for curIndex in range(count):
+				curHeight = gFirstBlockHeight + len(self.finders)
+				curFinder = None
+				if self.random.random() < self.poolChance:
+					curFinder = gDefaultFinderAddress
+					if (self.listSize > 0) and (self.random.random() < self.ourBlockChance):
+						curFinder = gMockAddressFormat % self.random.randrange(self.listSize)
+				self.finders.append(curFinder)
+				self.heights[self.getBlockHash(curHeight)] = curHeight
+				if gVerbose: sys.stderr.write("Mined block " + str(curHeight) + (", found by the pool for " + curFinder if curFinder else "") + "\n")
+			self.condition.notifyAll()
+
+	#---------------------------------------------------------------------------
+	# Returns the height of the tip of the chain
+	def getTipHeight(self):
+		return gFirstBlockHeight + len(self.finders) - 1
+
+	#---------------------------------------------------------------------------
+	# Returns the height of the block with the specified hash
+	def getHeight(self, blockHash):
+		if blockHash not in self.heights:
+			raise MockRpcError(gRpcBlockNotFoundCode, "Block not found")
+		return self.heights[blockHash]
+
+	#---------------------------------------------------------------------------
+	# Answer a JSON-RPC call
+	def call(self, method, params):
+		with self.condition:
+			if method == "getbestblockhash":
+				return self.getBlockHash(self.getTipHeight())
+			elif method == "getblockhash":
+				height = int(params[0])
+				if (height < gFirstBlockHeight) or (height > self.getTipHeight()):
+					raise MockRpcError(gRpcInvalidParameterCode, "Block height out of range")
+				return self.getBlockHash(height)
+			elif method == "getblockheader":
+				height = self.getHeight(params[0])
+				return {"hash": params[0], "height": height}
+			elif method == "getblock":
+				height = self.getHeight(params[0])
+				finder = self.finders[height - gFirstBlockHeight]
+				if finder:
+					outputs = [{"scriptPubKey": {"address": finder}}, {"scriptPubKey": {"address": gPoolFeeAddress}}]
+				else:
+					outputs = [{"scriptPubKey": {"address": gDefaultMinerAddress}}]
+				return {"hash": params[0], "height": height, "tx": [{"vout": outputs}]}
+			elif (method == "waitfornewblock") and self.longPoll:
+				# Wait for a new block or the timeout in milliseconds
+				tipHeight = self.getTipHeight()
+				timeoutSeconds = (int(params[0]) / 1000.0) if (len(params) > 0) and (int(params[0]) > 0) else None
+				deadline = time.time() + timeoutSeconds if timeoutSeconds else None
+				while self.getTipHeight() == tipHeight:
+					if deadline == None:
+						self.condition.wait()
+					elif time.time() >= deadline:
+						break
+					else:
+						self.condition.wait(deadline - time.time())
+				return {"hash": self.getBlockHash(self.getTipHeight()), "height": self.getTipHeight()}
+			
+			raise MockRpcError(gRpcMethodNotFoundCode, "Method not found")
+
+#---------------------------------------------------------------------------------------------------
+# Serve the mock pool over HTTP. Returns the server, which is already serving on a background thread.
+def startServer(mockPool, mockNode, address, port):
+	class MockRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+		def do_POST(self):
+			# Answer a JSON-RPC call like a bitcoin node does, with an HTTP error status for errors
+			request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+			status = 200
+			reply = {"result": None, "error": None, "id": request.get("id")}
+			try:
+				reply["result"] = mockNode.call(request.get("method"), request.get("params") or [])
+			except MockRpcError, e:
+				reply["error"] = {"code": e.code, "message": str(e)}
+				status = 404 if e.code == gRpcMethodNotFoundCode else 500
+			
+			body = json.dumps(reply)
+			self.send_response(status)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def do_GET(self):
+			path = self.path.split("?", 1)[0].rstrip("/")
+			name = path.split("/")[-1]
+			contentType = "application/json"
+			
+			# The difficulty and block explorer answers can be slow or fail
+			isLookup = (path == "/q/getdifficulty") or path.startswith("/address/") or path.startswith("/api/address/")
+			if isLookup and mockPool.isLookupFailure():
+				self.send_error(503, "Mock lookup failure")
+				return
+			
+			if path == "/list":
+				body = mockPool.getListText()
+				contentType = "text/plain"
+			elif path == "/q/getdifficulty":
+				body = repr(mockPool.difficulty)
+				contentType = "text/plain"
+			elif path.startswith("/users/") or path.startswith("/workers/"):
+				body = json.dumps(mockPool.getStats(name))
+			elif path.startswith("/address/"):
+				body = json.dumps(mockPool.getAddressResponse(name))
+			elif path.startswith("/api/address/") and path.endswith("/txs"):
+				body = json.dumps(mockPool.getEsploraResponse(path.split("/")[-2]))
+			else:
+				self.send_error(404, "Unknown mock pool path")
+				return
+
+			self.send_response(200)
+			self.send_header("Content-Type", contentType)
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			if gVerbose: sys.stderr.write((format % args) + "\n")
+
+	class ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+		daemon_threads = True
+
+	httpServer = ThreadingHTTPServer((address, port), MockRequestHandler)
+	serverThread = threading.Thread(target=httpServer.serve_forever, name="MockPool")
+	serverThread.daemon = True
+	serverThread.start()
+	return httpServer
+
+#---------------------------------------------------------------------------------------------------
+# Script starts here
+#---------------------------------------------------------------------------------------------------
+gVerbose = False
+
+usage = "usage: %prog [options]"
+parser = OptionParser(usage=usage, version="%prog 1.0")
+parser.set_defaults(verbose=False, address="127.0.0.1", port=gDefaultPort, listsize=gDefaultListSize, difficulty=gDefaultDifficulty, blockchance=gDefaultBlockChance, ourblockchance=0.0, bestsharechance=gDefaultBestShareChance, seed=0, nodeblockseconds=0, nodeblockcount=1, nodepoolchance=gDefaultNodePoolChance, nolongpoll=False, delay=0.0, failrate=0.0, unconfirmed=False)
+parser.add_option("-v", "--verbose",
+	action="store_true", dest="verbose",
+	help="Print each request.")
+parser.add_option("--address",
+	action="store", dest="address",
+	help="The address to listen on. Defaults to 127.0.0.1.")
+parser.add_option("--port",
+	action="store", type="int", dest="port",
+	help="The port to listen on. Defaults to " + str(gDefaultPort) + ".")
+parser.add_option("--listsize",
+	action="store", type="int", dest="listsize",
+	help="The number of workers in the monitor list served at /list. Defaults to " + str(gDefaultListSize) + ".")
+parser.add_option("--difficulty",
+	action="store", type="float", dest="difficulty",
+	help="The difficulty served at /q/getdifficulty. Defaults to " + str(gDefaultDifficulty) + ".")
+parser.add_option("--blockchance",
+	action="store", type="float", dest="blockchance",
+	help="The chance that the pool found a new block each time the block explorer is asked. Defaults to " + str(gDefaultBlockChance) + ".")
+parser.add_option("--ourblockchance",
+	action="store", type="float", dest="ourblockchance",
+	help="The chance that a new block was found by one of the listed workers rather than by someone else. Defaults to 0.")
+parser.add_option("--bestsharechance",
+	action="store", type="float", dest="bestsharechance",
+	help="The chance that a user or worker has a new best share each time it's read. Defaults to " + str(gDefaultBestShareChance) + ".")
+parser.add_option("--delay",
+	action="store", type="float", dest="delay",
+	help="Each difficulty and block explorer answer is delayed by a random time of up to this many seconds. Defaults to 0.")
+parser.add_option("--failrate",
+	action="store", type="float", dest="failrate",
+	help="The chance that each difficulty and block explorer request fails with an HTTP 503 error. Defaults to 0.")
+parser.add_option("--unconfirmed",
+	action="store_true", dest="unconfirmed",
+	help="If specified, then the block explorer responses list an unconfirmed transaction before the newest block.")
+parser.add_option("--nodeblockseconds",
+	action="store", type="int", dest="nodeblockseconds",
+	help="If specified, then the mock bitcoin node mines new blocks this often, in seconds. Otherwise its chain only has one block.")
+parser.add_option("--nodeblockcount",
+	action="store", type="int", dest="nodeblockcount",
+	help="The number of blocks the mock bitcoin node mines at a time. Defaults to 1.")
+parser.add_option("--nodepoolchance",
+	action="store", type="float", dest="nodepoolchance",
+	help="The chance that the pool found each block mined by the mock bitcoin node. Defaults to " + str(gDefaultNodePoolChance) + ". The --ourblockchance option also applies to these blocks.")
+parser.add_option("--nolongpoll",
+	action="store_true", dest="nolongpoll",
+	help="If specified, then the mock bitcoin node doesn't support long polling (waitfornewblock), like older nodes.")
+parser.add_option("--seed",
+	action="store", type="int", dest="seed",
+	help="The seed for the random stats and blocks. Defaults to 0.")
+
+(options, args) = parser.parse_args()
+gVerbose = options.verbose
+
+mockPool = MockPool(listSize=options.listsize, difficulty=options.difficulty, blockChance=options.blockchance, ourBlockChance=options.ourblockchance, bestShareChance=options.bestsharechance, delaySeconds=options.delay, failRate=options.failrate, unconfirmed=options.unconfirmed, seed=options.seed)
+mockNode = MockNode(listSize=options.listsize, poolChance=options.nodepoolchance, ourBlockChance=options.ourblockchance, longPoll=not options.nolongpoll, seed=options.seed)
+try:
+	httpServer = startServer(mockPool, mockNode, options.address, options.port)
+except Exception, e:
+	print("Could not start the mock pool: " + str(e))
+	sys.exit(1)
+
+print("Mock pool serving on http://" + options.address + ":" + str(options.port) + "/")
+try:
+	while True:
+		if options.nodeblockseconds > 0:
+			time.sleep(options.nodeblockseconds)
+			mockNode.mineBlocks(options.nodeblockcount)
+		else:
+			time.sleep(1)
+except KeyboardInterrupt:
+	httpServer.shutdown()
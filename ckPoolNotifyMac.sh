@@ -24,6 +24,10 @@ users="1JiWuyX94wrCr7JhkAn7x5qNMCEef1KhqX"
 listUrls=""
 notifyTime=""
 
+# If non-zero, then run a single monitor cycle and exit rather than monitoring forever. Use this
+# when launchd starts the script periodically (see StartInterval in the plist).
+once=0
+
 # If non-zero, then run in debug mode, outputting debug information
 debug=0
 
@@ -114,8 +118,15 @@ if [[ ! -z "${notifyTime}" ]]; then
 	[[ 0 -ne $debug ]] && echo "notifyTimeOption: $notifyTimeOption"
 fi
 
+# If we're only running a single cycle, then add an option to pass to the script
+onceOption=""
+if [[ 0 -ne $once ]]; then
+	onceOption="--once"
+	[[ 0 -ne $debug ]] && echo "onceOption: $onceOption"
+fi
+
 # Call the script that emails me when new blocks are found
-"${monitorScript}" --verbose --server $smtpServer $emailUserOption --sender $sender --recipients $recipients $workersOption $usersOption $listUrlsOption $notifyTimeOption
+"${monitorScript}" --verbose --server $smtpServer $emailUserOption --sender $sender --recipients $recipients $workersOption $usersOption $listUrlsOption $notifyTimeOption $onceOption
 result=$?
 if [[ $result -ne 0 ]]; then
 	fatalError "Got a $result result from: ${monitorScript}"